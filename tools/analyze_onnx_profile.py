@@ -8,168 +8,222 @@ Usage:
     python analyze_onnx_profile.py onnx_profile_*.json --by-type
 """
 
-import json
 import argparse
 import re
+import sys
 from pathlib import Path
-from collections import defaultdict
 
+try:
+    import ijson
+except ImportError:
+    print("Error: ijson library not installed.", file=sys.stderr)
+    print("Install with: pip install ijson", file=sys.stderr)
+    sys.exit(1)
 
-def load_profile(filepath: str) -> list:
-    """Load ONNX Runtime profiling JSON file.
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy library not installed.", file=sys.stderr)
+    print("Install with: pip install numpy", file=sys.stderr)
+    sys.exit(1)
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+
+class _LineReader:
+    """Minimal file-like wrapper that feeds ijson one line per read() call.
+
+    Keeps the underlying file position in step with the parser and remembers
+    the last line handed out, so after a parse error we can resync starting
+    from the line that failed.
+    """
+
+    def __init__(self, f, prefix: bytes = b''):
+        self._f = f
+        self._prefix = prefix
+        self.last_line = b''
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs str
+            return b''
+        if self._prefix:
+            data, self._prefix = self._prefix, b''
+            return data
+        self.last_line = self._f.readline()
+        return self.last_line
+
+
+def iter_events(filepath: str):
+    """Stream events from an ONNX Runtime profiling JSON file.
     
     Handles the case where multiple sessions write concatenated JSON arrays,
     including partially corrupted boundaries between arrays.
     """
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-    
-    # Try standard JSON first
-    content = ''.join(lines)
-    try:
-        return json.loads(content)
-    except json.JSONDecodeError:
-        pass
-    
-    # ONNX Runtime writes multiple JSON arrays concatenated together
-    # Find array boundaries by looking for lines that are just "]"
-    all_events = []
-    array_start = 0
-    array_count = 0
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped == ']':
-            # Found end of an array, try to parse from array_start to here
-            array_content = ''.join(lines[array_start:i+1])
+    count = 0
+    with open(filepath, 'rb') as f:
+        reader = _LineReader(f)
+        while True:
             try:
-                events = json.loads(array_content)
-                if isinstance(events, list):
-                    all_events.extend(events)
-                    array_count += 1
-                    print(f"  Parsed array {array_count}: {len(events)} events (lines {array_start+1}-{i+1})")
-            except json.JSONDecodeError as e:
-                # Try to recover by finding the first valid JSON object line
-                print(f"  Array at lines {array_start+1}-{i+1} failed: {e}")
+                # multiple_values lets ijson walk concatenated top-level arrays
+                for event in ijson.items(reader, 'item', multiple_values=True, use_float=True):
+                    count += 1
+                    yield event
+                break
+            except ijson.JSONError as e:
+                print(f"  Parse error before byte {f.tell()}: {e}")
                 print(f"  Attempting recovery...")
-                
-                # Find first line that looks like a JSON object
-                for j in range(array_start, i+1):
-                    if lines[j].strip().startswith('{"cat"'):
-                        # Build array from this point
-                        recovered_lines = ['[\n'] + lines[j:i+1]
-                        recovered_content = ''.join(recovered_lines)
-                        try:
-                            events = json.loads(recovered_content)
-                            if isinstance(events, list):
-                                all_events.extend(events)
-                                array_count += 1
-                                print(f"  Recovered array {array_count}: {len(events)} events (lines {j+1}-{i+1})")
-                                break
-                        except json.JSONDecodeError:
-                            continue
-            array_start = i + 1
+            
+            # Resync on the first line, starting with the one that failed, that
+            # holds a complete JSON object, then restart the parser after it as
+            # if it were the start of a new array
+            event = None
+            line = reader.last_line or f.readline()
+            while line:
+                stripped = line.strip()
+                if stripped.startswith(b'{"cat"'):
+                    try:
+                        event = _json.loads(stripped.rstrip(b','))
+                        break
+                    except ValueError:
+                        pass
+                line = f.readline()
+            if event is None:
+                break
+            print(f"  Resumed at byte {f.tell() - len(line)}")
+            count += 1
+            yield event
+            reader = _LineReader(f, prefix=b'[\n')
     
-    if not all_events:
+    if count == 0:
         raise ValueError(f"Could not parse any JSON from {filepath}")
     
-    print(f"Total: {len(all_events)} events from {array_count} session profiles")
-    return all_events
+    print(f"Total: {count} events")
 
 
-def analyze_profile(events: list, top_n: int = 15, group_by_type: bool = False):
-    """Analyze profiling events and print summary."""
+def _group_durations(keys: np.ndarray, durs: np.ndarray):
+    """Sum durations per unique key.
+    
+    Returns (keys, counts, totals_us) ordered by total time, slowest first;
+    keys with equal totals keep the order in which they first appear.
+    """
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    sorted_durs = durs[order]
+    uniq, starts = np.unique(sorted_keys, return_index=True)
+    totals = np.add.reduceat(sorted_durs, starts)
+    counts = np.diff(np.append(starts, len(sorted_durs)))
+    first_seen = order[starts]  # stable argsort: first original index of each key
+    rank = np.lexsort((first_seen, -totals))
+    return uniq[rank], counts[rank], totals[rank]
+
+
+def analyze_profile(events, top_n: int = 15, group_by_type: bool = False):
+    """Analyze profiling events and print summary.
+    
+    Makes a single pass over ``events``, so it accepts the iter_events()
+    stream directly; aggregation is then done on NumPy arrays.
+    """
     
     # Filter to kernel/operator events (have 'dur' field for duration)
-    ops = []
+    names = []
+    durs = []
+    cats = []
+    op_types = []
+    name_to_type = {}  # op names repeat across kernels, so derive each type once
     for event in events:
         # Skip non-dict items (can happen with nested structures)
-        if not isinstance(event, dict):
+        if not isinstance(event, dict) or 'dur' not in event or 'name' not in event:
             continue
-        if 'dur' in event and 'name' in event:
-            ops.append({
-                'name': event['name'],
-                'dur_us': event['dur'],  # duration in microseconds
-                'cat': event.get('cat', 'unknown'),
-                'args': event.get('args', {})
-            })
+        
+        name = event['name']
+        names.append(name)
+        durs.append(event['dur'])  # duration in microseconds
+        cats.append(event.get('cat', 'unknown'))
+        
+        if group_by_type:
+            op_type = event.get('args', {}).get('op_name') or name_to_type.get(name)
+            if op_type is None:
+                # Extract op type from name (e.g., "/layer/MatMul_1" -> "MatMul")
+                op_type = name.rpartition('/')[2].partition('_')[0]
+                name_to_type[name] = op_type
+            op_types.append(op_type)
     
-    if not ops:
+    if not durs:
         print("No operator timing events found in profile.")
         return
     
+    durs = np.asarray(durs, dtype=np.int64)
+    names = np.asarray(names, dtype=object)
+    cats = np.asarray(cats)
+    
     # Calculate total time
-    total_us = sum(op['dur_us'] for op in ops)
+    total_us = int(durs.sum())
     total_ms = total_us / 1000.0
     
     print(f"\n{'='*70}")
     print(f"ONNX Runtime Profile Summary")
     print(f"{'='*70}")
-    print(f"Total events: {len(ops)}")
+    print(f"Total events: {len(durs)}")
     print(f"Total time: {total_ms:.2f} ms ({total_us} µs)")
     print()
     
     if group_by_type:
-        # Group by operator type
-        by_type = defaultdict(lambda: {'count': 0, 'total_us': 0, 'ops': []})
-        
-        for op in ops:
-            # Extract op type from name (e.g., "/layer/MatMul" -> "MatMul")
-            name = op['name']
-            op_type = op['args'].get('op_name', name.split('/')[-1].split('_')[0])
-            
-            by_type[op_type]['count'] += 1
-            by_type[op_type]['total_us'] += op['dur_us']
-            by_type[op_type]['ops'].append(op)
-        
-        # Sort by total time
-        sorted_types = sorted(by_type.items(), key=lambda x: x[1]['total_us'], reverse=True)
+        # Group by operator type, sorted by total time
+        types, counts, totals = _group_durations(np.asarray(op_types), durs)
         
         print(f"{'Operator Type':<30} {'Count':>8} {'Total (ms)':>12} {'Avg (ms)':>10} {'%':>8}")
         print('-' * 70)
         
-        for op_type, data in sorted_types[:top_n]:
-            count = data['count']
-            total = data['total_us'] / 1000.0
+        for op_type, count, type_us in zip(types[:top_n], counts[:top_n], totals[:top_n]):
+            total = type_us / 1000.0
             avg = total / count if count > 0 else 0
-            pct = (data['total_us'] / total_us * 100) if total_us > 0 else 0
+            pct = (type_us / total_us * 100) if total_us > 0 else 0
             print(f"{op_type:<30} {count:>8} {total:>12.3f} {avg:>10.3f} {pct:>7.1f}%")
         
     else:
-        # Sort by duration (slowest first)
-        sorted_ops = sorted(ops, key=lambda x: x['dur_us'], reverse=True)
+        # Select the slowest top_n without sorting everything: find the k-th
+        # largest duration, then take everything above it plus the earliest
+        # ties, which is what a stable sort would pick
+        k = max(0, min(top_n, len(durs)))
+        if 0 < k < len(durs):
+            kth = -np.partition(-durs, k - 1)[k - 1]
+            above = np.flatnonzero(durs > kth)
+            ties = np.flatnonzero(durs == kth)[:k - len(above)]
+            idx = np.concatenate((above, ties))
+        else:
+            idx = np.arange(k)
+        # Slowest first, ties in file order
+        idx = idx[np.lexsort((idx, -durs[idx]))]
         
         print(f"Top {top_n} Slowest Operations:")
         print(f"{'Operation':<50} {'Time (ms)':>12} {'%':>8}")
         print('-' * 70)
         
-        for op in sorted_ops[:top_n]:
-            dur_ms = op['dur_us'] / 1000.0
-            pct = (op['dur_us'] / total_us * 100) if total_us > 0 else 0
-            name = op['name'][:48] + '..' if len(op['name']) > 50 else op['name']
+        for i in idx:
+            dur_ms = durs[i] / 1000.0
+            pct = (durs[i] / total_us * 100) if total_us > 0 else 0
+            name = names[i][:48] + '..' if len(names[i]) > 50 else names[i]
             print(f"{name:<50} {dur_ms:>12.3f} {pct:>7.1f}%")
     
     # Show session-level events
     print()
     print("Session Events:")
     print('-' * 70)
-    session_events = [op for op in ops if op['cat'] == 'Session']
-    for op in session_events:
-        dur_ms = op['dur_us'] / 1000.0
-        print(f"  {op['name']:<45} {dur_ms:>10.3f} ms")
+    for i in np.flatnonzero(cats == 'Session'):
+        dur_ms = durs[i] / 1000.0
+        print(f"  {names[i]:<45} {dur_ms:>10.3f} ms")
     
     # Summary by category
     print()
     print("By Category:")
     print('-' * 70)
-    by_cat = defaultdict(lambda: {'count': 0, 'total_us': 0})
-    for op in ops:
-        by_cat[op['cat']]['count'] += 1
-        by_cat[op['cat']]['total_us'] += op['dur_us']
-    
-    for cat, data in sorted(by_cat.items(), key=lambda x: x[1]['total_us'], reverse=True):
-        total = data['total_us'] / 1000.0
-        pct = (data['total_us'] / total_us * 100) if total_us > 0 else 0
+    for cat, _, cat_us in zip(*_group_durations(cats, durs)):
+        total = cat_us / 1000.0
+        pct = (cat_us / total_us * 100) if total_us > 0 else 0
         print(f"  {cat:<45} {total:>10.3f} ms ({pct:.1f}%)")
 
 
@@ -187,7 +241,7 @@ def main():
             continue
         
         print(f"\nAnalyzing: {filepath}")
-        events = load_profile(filepath)
+        events = iter_events(filepath)
         analyze_profile(events, top_n=args.top, group_by_type=args.by_type)
 
 
@@ -10,9 +10,66 @@ Usage:
 """
 
 import argparse
-import struct
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy library not installed.", file=sys.stderr)
+    print("Install with: pip install numpy", file=sys.stderr)
+    sys.exit(1)
+
+
+def write_tokens(output_path: str, tokens: list):
+    """Write one .tokens file: [num_tokens (uint32)] [token_ids (uint32 each)]."""
+    buf = np.empty(1 + len(tokens), dtype="<u4")
+    buf[0] = len(tokens)
+    buf[1:] = tokens
+    buf.tofile(output_path)
+
+
+def load_batch_encoder(model_id: str):
+    """Load the tokenizer for model_id and return a batch encode function.
+    
+    The returned function maps a list of lines to a list of token ID lists,
+    without special tokens. Prefers the raw tokenizers.Tokenizer built from
+    tokenizer.json (read from model_id if it is a local directory, otherwise
+    downloaded from the Hub), falling back to transformers.AutoTokenizer.
+    """
+    try:
+        from tokenizers import Tokenizer
+        
+        if os.path.isdir(model_id):
+            tokenizer_path = os.path.join(model_id, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            tokenizer_path = hf_hub_download(model_id, "tokenizer.json")
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        
+        def encode_batch(lines):
+            return [enc.ids for enc in tokenizer.encode_batch(lines, add_special_tokens=False)]
+        
+        return encode_batch
+    except Exception as e:
+        fast_error = e
+    
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        # Report why the tokenizers path failed rather than the missing fallback
+        raise fast_error
+    
+    print(f"Note: could not load tokenizer.json with tokenizers ({fast_error}); "
+          f"falling back to transformers.AutoTokenizer", file=sys.stderr)
+    tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+    
+    def encode_batch(lines):
+        return tokenizer(lines, add_special_tokens=False, return_attention_mask=False)["input_ids"]
+    
+    return encode_batch
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -42,20 +99,24 @@ Output files:
     parser.add_argument("--verbose", "-v", action="store_true", help="Print each line being processed")
     args = parser.parse_args()
     
-    # Import transformers
-    try:
-        from transformers import AutoTokenizer
-    except ImportError:
-        print("Error: transformers library not installed.", file=sys.stderr)
-        print("Install with: pip install transformers", file=sys.stderr)
-        sys.exit(1)
+    # Let the Rust tokenizers backend use all cores for batch encoding
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
     
     # Create output directory
     os.makedirs(args.output_dir, exist_ok=True)
     
     # Load tokenizer
     print(f"Loading tokenizer from {args.model}...")
-    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    try:
+        encode_batch = load_batch_encoder(args.model)
+    except ImportError as e:
+        module = e.name or "tokenizers"
+        print(f"Error: {module} library not installed.", file=sys.stderr)
+        print(f"Install with: pip install {module}", file=sys.stderr)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error loading tokenizer: {e}", file=sys.stderr)
+        sys.exit(1)
     
     # Read input file
     try:
@@ -71,26 +132,30 @@ Output files:
     
     print(f"Processing {len(lines)} lines...")
     
-    # Process each line
+    # Tokenize all lines in one batch call (no special tokens - those are handled by the model)
+    all_tokens = encode_batch(lines)
+    
+    output_paths = [
+        os.path.join(args.output_dir, f"{args.prefix}_{i:04d}.tokens")
+        for i in range(len(lines))
+    ]
+    
+    # Writing many small files is I/O-bound, so overlap the writes on a thread pool.
+    # Results come back in input order, which keeps the progress output ordered.
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
     total_tokens = 0
-    for i, line in enumerate(lines):
-        tokens = tokenizer.encode(line, add_special_tokens=False)
-        total_tokens += len(tokens)
-        
-        output_path = os.path.join(args.output_dir, f"{args.prefix}_{i:04d}.tokens")
-        
-        with open(output_path, "wb") as f:
-            f.write(struct.pack("<I", len(tokens)))
-            for tok in tokens:
-                f.write(struct.pack("<I", tok))
-        
-        if args.verbose:
-            preview = line[:50] + "..." if len(line) > 50 else line
-            print(f"  [{i+1:4d}/{len(lines)}] {len(tokens):4d} tokens: \"{preview}\"")
-        else:
-            # Progress indicator
-            if (i + 1) % 100 == 0 or i == len(lines) - 1:
-                print(f"  Processed {i+1}/{len(lines)} lines...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        written = executor.map(write_tokens, output_paths, all_tokens)
+        for i, (line, tokens, _) in enumerate(zip(lines, all_tokens, written)):
+            total_tokens += len(tokens)
+            
+            if args.verbose:
+                preview = line[:50] + "..." if len(line) > 50 else line
+                print(f"  [{i+1:4d}/{len(lines)}] {len(tokens):4d} tokens: \"{preview}\"")
+            else:
+                # Progress indicator
+                if (i + 1) % 100 == 0 or i == len(lines) - 1:
+                    print(f"  Processed {i+1}/{len(lines)} lines...")
     
     print(f"\nDone! Created {len(lines)} token files in {args.output_dir}/")
     print(f"Total tokens: {total_tokens} (avg: {total_tokens/len(lines):.1f} per line)")
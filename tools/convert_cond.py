@@ -12,6 +12,7 @@ Usage:
 """
 
 import argparse
+import mmap
 import struct
 import sys
 from pathlib import Path
@@ -33,40 +34,49 @@ COND_VERSION = 1
 
 
 def read_cond_file(filepath: str) -> dict:
-    """Read a .cond file and return tensors as numpy arrays."""
+    """Read a .cond file and return tensors as numpy arrays.
+    
+    The arrays are read-only, zero-copy views into a memory map of the file;
+    the mapping stays open for as long as any of them is referenced.
+    """
     
     with open(filepath, 'rb') as f:
-        # Read header
-        magic, version = struct.unpack('<II', f.read(8))
-        
-        if magic != COND_MAGIC:
-            raise ValueError(f"Invalid magic number: 0x{magic:08X}, expected 0x{COND_MAGIC:08X}")
-        
-        if version != COND_VERSION:
-            raise ValueError(f"Unsupported version: {version}, expected {COND_VERSION}")
-        
-        def read_float_array():
-            num_dims = struct.unpack('<I', f.read(4))[0]
-            shape = struct.unpack(f'<{num_dims}q', f.read(8 * num_dims))
-            data_size = struct.unpack('<Q', f.read(8))[0]
-            data = np.frombuffer(f.read(data_size), dtype=np.float32)
-            return data.reshape(shape)
-        
-        def read_int64_array():
-            num_dims = struct.unpack('<I', f.read(4))[0]
-            shape = struct.unpack(f'<{num_dims}q', f.read(8 * num_dims))
-            data_size = struct.unpack('<Q', f.read(8))[0]
-            data = np.frombuffer(f.read(data_size), dtype=np.int64)
-            return data.reshape(shape)
-        
-        result = {
-            'cond_emb': read_float_array(),
-            'prompt_token': read_int64_array(),
-            'speaker_embeddings': read_float_array(),
-            'speaker_features': read_float_array(),
-        }
-        
-        return result
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    # Read header
+    magic, version = struct.unpack_from('<II', mm, 0)
+    
+    if magic != COND_MAGIC:
+        mm.close()
+        raise ValueError(f"Invalid magic number: 0x{magic:08X}, expected 0x{COND_MAGIC:08X}")
+    
+    if version != COND_VERSION:
+        mm.close()
+        raise ValueError(f"Unsupported version: {version}, expected {COND_VERSION}")
+    
+    offset = 8
+    
+    def read_array(dtype):
+        nonlocal offset
+        num_dims = struct.unpack_from('<I', mm, offset)[0]
+        offset += 4
+        shape = struct.unpack_from(f'<{num_dims}q', mm, offset)
+        offset += 8 * num_dims
+        data_size = struct.unpack_from('<Q', mm, offset)[0]
+        offset += 8
+        count = data_size // np.dtype(dtype).itemsize
+        data = np.frombuffer(mm, dtype=dtype, count=count, offset=offset)
+        offset += data_size
+        return data.reshape(shape)
+    
+    result = {
+        'cond_emb': read_array(np.float32),
+        'prompt_token': read_array(np.int64),
+        'speaker_embeddings': read_array(np.float32),
+        'speaker_features': read_array(np.float32),
+    }
+    
+    return result
 
 
 def write_cond_file(filepath: str, data: dict):
@@ -76,28 +86,17 @@ def write_cond_file(filepath: str, data: dict):
         # Write header
         f.write(struct.pack('<II', COND_MAGIC, COND_VERSION))
         
-        def write_float_array(arr):
-            arr = np.asarray(arr, dtype=np.float32)
-            shape = arr.shape
-            f.write(struct.pack('<I', len(shape)))
-            f.write(struct.pack(f'<{len(shape)}q', *shape))
-            data_bytes = arr.tobytes()
-            f.write(struct.pack('<Q', len(data_bytes)))
-            f.write(data_bytes)
-        
-        def write_int64_array(arr):
-            arr = np.asarray(arr, dtype=np.int64)
+        def write_array(arr, dtype):
+            arr = np.asarray(arr, dtype=dtype)
             shape = arr.shape
-            f.write(struct.pack('<I', len(shape)))
-            f.write(struct.pack(f'<{len(shape)}q', *shape))
-            data_bytes = arr.tobytes()
-            f.write(struct.pack('<Q', len(data_bytes)))
-            f.write(data_bytes)
+            # numDims, shape and dataSize in one pack, then stream the payload
+            f.write(struct.pack(f'<I{len(shape)}qQ', len(shape), *shape, arr.nbytes))
+            arr.tofile(f)
         
-        write_float_array(data['cond_emb'])
-        write_int64_array(data['prompt_token'])
-        write_float_array(data['speaker_embeddings'])
-        write_float_array(data['speaker_features'])
+        write_array(data['cond_emb'], '<f4')
+        write_array(data['prompt_token'], '<i8')
+        write_array(data['speaker_embeddings'], '<f4')
+        write_array(data['speaker_features'], '<f4')
 
 
 def print_info(data: dict, filepath: str):
@@ -133,7 +132,8 @@ def convert_to_torch(data: dict, output_path: str):
         print("Error: PyTorch not installed. Install with: pip install torch")
         sys.exit(1)
     
-    torch_data = {k: torch.from_numpy(v) for k, v in data.items()}
+    # Copy out of the read-only file mapping; torch expects writable buffers
+    torch_data = {k: torch.from_numpy(v.copy()) for k, v in data.items()}
     torch.save(torch_data, output_path)
     print(f"Saved to: {output_path}")
 
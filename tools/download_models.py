@@ -10,6 +10,7 @@ Usage:
 """
 
 import argparse
+import importlib.metadata
 import os
 import sys
 
@@ -33,32 +34,6 @@ EXTRA_FILES = [
 REPO_ID = "ResembleAI/chatterbox-turbo-ONNX"
 
 
-def download_file(repo_id: str, filename: str, local_path: str, token: str = None):
-    """Download a single file from HuggingFace Hub."""
-    from huggingface_hub import hf_hub_download
-    
-    # Determine subfolder from filename
-    if filename.startswith("onnx/"):
-        subfolder = "onnx"
-        filename = filename[5:]  # Remove "onnx/" prefix
-    else:
-        subfolder = None
-    
-    try:
-        downloaded_path = hf_hub_download(
-            repo_id=repo_id,
-            filename=filename,
-            subfolder=subfolder,
-            local_dir=local_path,
-            local_dir_use_symlinks=False,
-            token=token,
-        )
-        return downloaded_path
-    except Exception as e:
-        print(f"  Error downloading {filename}: {e}")
-        return None
-
-
 def main():
     parser = argparse.ArgumentParser(
         description="Download Chatterbox TTS ONNX models from HuggingFace",
@@ -85,9 +60,25 @@ Model sizes (approximate):
                         help="Skip downloading tokenizer files")
     args = parser.parse_args()
     
-    # Import huggingface_hub
+    # Turn on the hub's high-throughput download backend. huggingface_hub 1.0+
+    # dropped hf_transfer for Xet (and warns if the old flag is set); older
+    # versions use hf_transfer, but only when it is installed
+    try:
+        hub_major = int(importlib.metadata.version("huggingface_hub").split(".")[0])
+    except (importlib.metadata.PackageNotFoundError, ValueError):
+        hub_major = None
+    if hub_major is not None and hub_major >= 1:
+        os.environ.setdefault("HF_XET_HIGH_PERFORMANCE", "1")
+    elif hub_major is not None:
+        try:
+            import hf_transfer  # noqa: F401
+            os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+        except ImportError:
+            print("Tip: for faster downloads: pip install hf_transfer")
+    
+    # Import huggingface_hub (after setting HF_* env vars, which it reads on import)
     try:
-        from huggingface_hub import hf_hub_download, HfApi
+        from huggingface_hub import snapshot_download
     except ImportError:
         print("Error: huggingface_hub library not installed.", file=sys.stderr)
         print("Install with: pip install huggingface_hub", file=sys.stderr)
@@ -106,39 +97,48 @@ Model sizes (approximate):
     print(f"Output: {args.output_dir}/")
     print()
     
-    # Download ONNX model files
+    # Collect every file we want and fetch them all in one parallel snapshot
     dtype_suffix = f"_{args.dtype}" if args.dtype != "fp32" else ""
     
     model_names = ["speech_encoder", "embed_tokens", "language_model", "conditional_decoder"]
     
-    for model_name in model_names:
-        # Main .onnx file
-        onnx_filename = f"{model_name}{dtype_suffix}.onnx"
-        onnx_data_filename = f"{model_name}{dtype_suffix}.onnx_data"
-        
-        print(f"Downloading {onnx_filename}...")
-        result = download_file(REPO_ID, f"onnx/{onnx_filename}", args.output_dir, token)
-        if result:
-            print(f"  ✓ {onnx_filename}")
-        
-        # Try to download .onnx_data file (may not exist for all models)
-        print(f"Downloading {onnx_data_filename}...")
-        result = download_file(REPO_ID, f"onnx/{onnx_data_filename}", args.output_dir, token)
-        if result:
-            print(f"  ✓ {onnx_data_filename}")
+    onnx_files = [f"onnx/{m}{dtype_suffix}.onnx" for m in model_names]
+    # .onnx_data files may not exist for all models; unmatched patterns are ignored
+    onnx_data_files = [f"onnx/{m}{dtype_suffix}.onnx_data" for m in model_names]
+    extra_files = EXTRA_FILES if not args.skip_tokenizer else []
+    
+    print("Downloading model files...")
+    try:
+        snapshot_download(
+            repo_id=REPO_ID,
+            allow_patterns=onnx_files + onnx_data_files + extra_files,
+            local_dir=args.output_dir,
+            max_workers=4,  # inter-file parallelism; the transfer backend splits each file
+            token=token,
+        )
+    except Exception as e:
+        print(f"Error downloading models: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    def downloaded(filename: str) -> bool:
+        return os.path.isfile(os.path.join(args.output_dir, filename))
+    
+    for onnx_file, onnx_data_file in zip(onnx_files, onnx_data_files):
+        if downloaded(onnx_file):
+            print(f"  ✓ {os.path.basename(onnx_file)}")
         else:
-            print(f"  (no external data file)")
+            print(f"  ✗ {os.path.basename(onnx_file)} (not found in repository)")
+        if downloaded(onnx_data_file):
+            print(f"  ✓ {os.path.basename(onnx_data_file)}")
+        else:
+            print(f"  {os.path.basename(onnx_data_file)}: (no external data file)")
     
-    # Download tokenizer files
-    if not args.skip_tokenizer:
-        print("\nDownloading tokenizer files...")
-        for filename in EXTRA_FILES:
-            print(f"Downloading {filename}...")
-            result = download_file(REPO_ID, filename, args.output_dir, token)
-            if result:
-                print(f"  ✓ {filename}")
-            else:
-                print(f"  (optional, skipped)")
+    # Tokenizer files are optional
+    for filename in extra_files:
+        if downloaded(filename):
+            print(f"  ✓ {filename}")
+        else:
+            print(f"  {filename}: (optional, skipped)")
     
     print("\n" + "="*50)
     print("Download complete!")
@@ -14,9 +14,61 @@ Binary format:
 """
 
 import argparse
-import struct
+import os
 import sys
 
+try:
+    import numpy as np
+except ImportError:
+    print("Error: numpy library not installed.", file=sys.stderr)
+    print("Install with: pip install numpy", file=sys.stderr)
+    sys.exit(1)
+
+
+def load_tokenizer(model_id: str):
+    """Load the tokenizer for model_id and return (encode, decode) functions.
+    
+    Prefers the raw tokenizers.Tokenizer built from tokenizer.json (read from
+    model_id if it is a local directory, otherwise downloaded from the Hub),
+    which skips the transformers import and wrapper setup. Falls back to
+    transformers.AutoTokenizer if that is not available.
+    """
+    try:
+        from tokenizers import Tokenizer
+        
+        if os.path.isdir(model_id):
+            tokenizer_path = os.path.join(model_id, "tokenizer.json")
+        else:
+            from huggingface_hub import hf_hub_download
+            tokenizer_path = hf_hub_download(model_id, "tokenizer.json")
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        
+        def encode(text):
+            return tokenizer.encode(text, add_special_tokens=False).ids
+        
+        def decode(ids):
+            return tokenizer.decode(ids, skip_special_tokens=False)
+        
+        return encode, decode
+    except Exception as e:
+        fast_error = e
+    
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        # Report why the tokenizers path failed rather than the missing fallback
+        raise fast_error
+    
+    print(f"Note: could not load tokenizer.json with tokenizers ({fast_error}); "
+          f"falling back to transformers.AutoTokenizer", file=sys.stderr)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    
+    def encode(text):
+        return tokenizer.encode(text, add_special_tokens=False)
+    
+    return encode, tokenizer.decode
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Pretokenize text for Chatterbox TTS C++ demo",
@@ -37,38 +89,35 @@ Then run C++ demo:
                         help="HuggingFace model ID for tokenizer (default: ResembleAI/chatterbox-turbo-ONNX)")
     args = parser.parse_args()
     
-    # Import transformers here to give better error message if not installed
-    try:
-        from transformers import AutoTokenizer
-    except ImportError:
-        print("Error: transformers library not installed.", file=sys.stderr)
-        print("Install with: pip install transformers", file=sys.stderr)
-        sys.exit(1)
-    
     # Load tokenizer
     if args.verbose:
         print(f"Loading tokenizer from {args.model}...")
     
     try:
-        tokenizer = AutoTokenizer.from_pretrained(args.model)
+        encode, decode = load_tokenizer(args.model)
+    except ImportError as e:
+        module = e.name or "tokenizers"
+        print(f"Error: {module} library not installed.", file=sys.stderr)
+        print(f"Install with: pip install {module}", file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"Error loading tokenizer: {e}", file=sys.stderr)
         sys.exit(1)
     
     # Tokenize text (no special tokens - those are handled by the model)
-    tokens = tokenizer.encode(args.text, add_special_tokens=False)
+    tokens = encode(args.text)
     
     if len(tokens) == 0:
         print("Warning: Text produced no tokens!", file=sys.stderr)
     
     # Write binary format: [num_tokens (uint32)] [token_ids (uint32 each)]
     try:
+        # Build the whole file as one little-endian uint32 buffer
+        buf = np.empty(1 + len(tokens), dtype="<u4")
+        buf[0] = len(tokens)
+        buf[1:] = tokens
         with open(args.output, "wb") as f:
-            # Write number of tokens (little-endian uint32)
-            f.write(struct.pack("<I", len(tokens)))
-            # Write each token ID (little-endian uint32)
-            for tok in tokens:
-                f.write(struct.pack("<I", tok))
+            buf.tofile(f)
     except IOError as e:
         print(f"Error writing output file: {e}", file=sys.stderr)
         sys.exit(1)
@@ -81,13 +130,13 @@ Then run C++ demo:
         print(f"Token IDs:  {tokens}")
         
         # Decode back to verify
-        decoded = tokenizer.decode(tokens)
+        decoded = decode(tokens)
         print(f"Decoded:    \"{decoded}\"")
         
         # Show individual tokens
         print("\nToken breakdown:")
         for i, tok in enumerate(tokens):
-            tok_str = tokenizer.decode([tok])
+            tok_str = decode([tok])
             print(f"  [{i:3d}] {tok:6d} -> \"{tok_str}\"")
 
 